@@ -7,22 +7,70 @@ Original images are preserved; new files are created with specified output names
 """
 
 import json
+import os
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json works, just slower
+    orjson = None
+
+# Font used when the config doesn't specify one
+DEFAULT_FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+
+# Pattern matching "(<n> image/images)" in prompt files
+_IMG_COUNT_RE = re.compile(r'\(\d+\s+images?\)')
+
+
+def _read_json(json_path) -> dict:
+    """Parse a JSON file from raw bytes, using orjson when available."""
+    data = Path(json_path).read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _write_json(json_path, data) -> None:
+    """Serialize data to a JSON file, using orjson when available."""
+    if orjson is not None:
+        Path(json_path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
 
 def load_config(config_path: str) -> dict:
     """Load configuration from JSON file and expand paths."""
     try:
-        with open(config_path, 'r') as f:
-            config = json.load(f)
+        config = _read_json(config_path)
 
         # Expand project_folder path if it exists
         if "project_folder" in config:
             project_folder = Path(config["project_folder"]).expanduser()
             config["project_folder"] = str(project_folder)
 
+        # Validate the font once so the per-image path needs no fallback
+        config["_resolved_font"] = _resolve_font(config.get("font_path", DEFAULT_FONT_PATH))
+
+        # Normalize colors once so the per-image path only sees RGB tuples
+        for section in ("sfw", "nsfw"):
+            sub = config.get(section)
+            if sub is not None:
+                rgb = sub.get("color", "#FFFFFF")
+                if isinstance(rgb, str):
+                    try:
+                        rgb = hex_to_rgb(rgb)
+                    except ValueError:
+                        print(f"Error: Invalid color '{rgb}' in '{section}' section")
+                        sys.exit(1)
+                sub["color"] = rgb
+                sub["outline_color"] = (0, 0, 0) if sum(rgb) > 384 else (255, 255, 255)
+
         return config
     except FileNotFoundError:
         print(f"Error: Config file not found: {config_path}")
@@ -32,10 +80,103 @@ def load_config(config_path: str) -> dict:
         sys.exit(1)
 
 
+@lru_cache(maxsize=None)
+def _platform_patterns(platform: str) -> tuple:
+    """Compile the per-platform patterns for socialmedia.txt once."""
+    escaped = re.escape(platform)
+    return (
+        re.compile(rf'{escaped}\s*\([^)]+\)'),
+        re.compile(rf'{escaped}(?=\s*[&!])'),
+    )
+
+
+def _patch_json(config_path: str, patch_fn) -> bool:
+    """
+    Load a JSON config, apply patch_fn to the parsed data, and write it back.
+
+    patch_fn receives the parsed dict and returns True when it changed
+    anything; unchanged files are not rewritten.
+
+    Returns:
+        True if the file was modified and rewritten, False otherwise
+    """
+    data = _read_json(config_path)
+
+    if not patch_fn(data):
+        return False
+
+    _write_json(config_path, data)
+    return True
+
+
+def _resolve_font(font_path: str):
+    """Check once that the configured font loads; None means use the default."""
+    try:
+        ImageFont.truetype(font_path, 10)
+        return font_path
+    except OSError:
+        print(f"Warning: Could not load font '{font_path}'. Using default font.")
+        return None
+
+
+@lru_cache(maxsize=32)
+def _load_font(font_path, font_size: int):
+    """
+    Load a TrueType font, caching it so repeated calls skip disk I/O.
+
+    A font_path of None selects PIL's built-in default font; the path is
+    validated once up front by _resolve_font, so no fallback is needed here.
+    """
+    if font_path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(font_path, font_size)
+
+
+def _draw_outlined_text(img, xy, text, font, fill, outline_color, bbox, stroke_width=2):
+    """
+    Render outlined text on a small transparent layer and composite it once.
+
+    The layer is sized to the text bbox (plus stroke padding), so only the
+    text's footprint on the base image is touched in a single pass instead
+    of the base being written per draw call.
+
+    Args:
+        img: Base image to composite onto
+        xy: Text anchor position on the base image
+        text: Text to render
+        font: Font to render with
+        fill: RGB tuple for the text fill
+        outline_color: RGB tuple for the stroke
+        bbox: Text bbox as returned by textbbox((0, 0), text, font=font)
+        stroke_width: Outline width in pixels
+    """
+    pad = 2 * stroke_width
+    layer = Image.new(
+        "RGBA",
+        (bbox[2] - bbox[0] + 2 * pad, bbox[3] - bbox[1] + 2 * pad),
+        (0, 0, 0, 0),
+    )
+    layer_draw = ImageDraw.Draw(layer)
+    layer_draw.text(
+        (pad - bbox[0], pad - bbox[1]),
+        text,
+        font=font,
+        fill=tuple(fill) + (255,),
+        stroke_width=stroke_width,
+        stroke_fill=tuple(outline_color) + (255,),
+    )
+
+    dest = (xy[0] + bbox[0] - pad, xy[1] + bbox[1] - pad)
+    if img.mode == "RGBA" and dest[0] >= 0 and dest[1] >= 0:
+        img.alpha_composite(layer, dest=dest)
+    else:
+        # paste accepts negative offsets and non-RGBA bases
+        img.paste(layer, dest, layer)
+
+
 def hex_to_rgb(hex_color: str) -> tuple:
     """Convert hex color string to RGB tuple."""
-    hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    return tuple(bytes.fromhex(hex_color.lstrip('#')))
 
 
 def add_text_to_image(
@@ -48,7 +189,9 @@ def add_text_to_image(
     position: str = "bottom",
     blur: bool = False,
     blur_radius: int = 15,
-    num_images: int = None
+    num_images: int = None,
+    max_output_width: int = None,
+    outline_color: tuple = None
 ) -> None:
     """
     Add text to an image and save to a new file.
@@ -64,14 +207,34 @@ def add_text_to_image(
         blur: Whether to blur the image before adding text
         blur_radius: Blur radius (higher = more blur)
         num_images: Optional number of images to append to text (e.g., " (3 images)")
+        max_output_width: Optional width cap; larger images are downscaled first
+        outline_color: Optional RGB tuple for the text outline (auto-picked if None)
     """
     try:
         # Open the image
         img = Image.open(input_path)
 
-        # Apply blur if requested
+        # Downscale early so blur, drawing and encoding run on fewer pixels.
+        # draft() lets libjpeg decode JPEG sources at reduced resolution.
+        if max_output_width and img.size[0] > max_output_width:
+            img.draft("RGB", (max_output_width, max_output_width * 10))
+            if img.size[0] > max_output_width:
+                img.thumbnail((max_output_width, max_output_width * 10), Image.LANCZOS)
+
+        # Convert to a stable pixel mode once; blur and draw would otherwise
+        # each trigger a hidden full-image conversion for e.g. paletted input
+        suffix = Path(output_path).suffix.lower()
+        if suffix in (".jpg", ".jpeg"):
+            # JPEG can't store alpha
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+
+        # Apply blur if requested (BoxBlur is a single pass and much faster
+        # than GaussianBlur; for censoring the exact blur shape doesn't matter)
         if blur:
-            img = img.filter(ImageFilter.GaussianBlur(radius=blur_radius))
+            img = img.filter(ImageFilter.BoxBlur(blur_radius))
 
         # Get image dimensions and calculate font size
         img_width, img_height = img.size
@@ -79,18 +242,13 @@ def add_text_to_image(
 
         draw = ImageDraw.Draw(img)
 
-        # Load font
-        try:
-            font = ImageFont.truetype(font_path, font_size)
-        except OSError:
-            print(f"Warning: Could not load font '{font_path}'. Using default font.")
-            font = ImageFont.load_default()
-
-        # Convert color
-        if isinstance(color, str):
-            rgb_color = hex_to_rgb(color)
-        else:
-            rgb_color = color
+        # Load font (cached across calls)
+        font = _load_font(font_path, font_size)
+
+        # Colors are normalized in load_config; fall back for direct calls
+        rgb_color = hex_to_rgb(color) if isinstance(color, str) else tuple(color)
+        if outline_color is None:
+            outline_color = (0, 0, 0) if sum(rgb_color) > 384 else (255, 255, 255)
 
         # Get main text bounding box
         bbox = draw.textbbox((0, 0), text, font=font)
@@ -100,19 +258,18 @@ def add_text_to_image(
         # Prepare image count text if provided
         count_text = None
         count_font = None
+        count_width = 0
         count_height = 0
         if num_images is not None:
             image_word = "images" if num_images > 1 else "image"
             count_text = f"({num_images} {image_word})"
             # Make count font size 60% of main font size
             count_font_size = int(font_size * 0.6)
-            try:
-                count_font = ImageFont.truetype(font_path, count_font_size)
-            except OSError:
-                count_font = ImageFont.load_default()
+            count_font = _load_font(font_path, count_font_size)
 
-            # Get count text dimensions
+            # Get count text dimensions (shaped once, reused for placement)
             count_bbox = draw.textbbox((0, 0), count_text, font=count_font)
+            count_width = count_bbox[2] - count_bbox[0]
             count_height = count_bbox[3] - count_bbox[1]
 
         # Calculate total height (main text + count text with spacing)
@@ -132,37 +289,27 @@ def add_text_to_image(
         else:  # center
             y = (img_height - total_height) // 2
 
-        # Draw text with outline for better visibility
-        outline_color = (0, 0, 0) if sum(rgb_color) > 384 else (255, 255, 255)
-
-        # Draw outline for main text
-        for adj_x in range(-2, 3):
-            for adj_y in range(-2, 3):
-                draw.text((x + adj_x, y + adj_y), text, font=font, fill=outline_color)
-
-        # Draw main text
-        draw.text((x, y), text, font=font, fill=rgb_color)
+        # Draw main text with outline via a small composited layer
+        _draw_outlined_text(img, (x, y), text, font, rgb_color, outline_color, bbox)
 
         # Draw count text if provided
         if count_text and count_font:
             spacing = int(font_size * 0.2)
             count_y = y + text_height + spacing
-            count_bbox = draw.textbbox((0, 0), count_text, font=count_font)
-            count_width = count_bbox[2] - count_bbox[0]
             count_x = (img_width - count_width) // 2
 
-            # Draw outline for count text
-            for adj_x in range(-2, 3):
-                for adj_y in range(-2, 3):
-                    draw.text((count_x + adj_x, count_y + adj_y), count_text, font=count_font, fill=outline_color)
-
-            # Draw count text
-            draw.text((count_x, count_y), count_text, font=count_font, fill=rgb_color)
+            # Draw count text with outline
+            _draw_outlined_text(img, (count_x, count_y), count_text, count_font, rgb_color, outline_color, count_bbox)
 
-        # Save the output image
-        output_dir = Path(output_path).parent
-        output_dir.mkdir(parents=True, exist_ok=True)
-        img.save(output_path)
+        # Save the output image (main() creates the output directories up front)
+        # Use fast encoder settings; the output is an intermediate artifact
+        # for the downstream APIs, so a slightly larger file is fine
+        if suffix == ".png":
+            img.save(output_path, optimize=False, compress_level=1)
+        elif suffix in (".jpg", ".jpeg"):
+            img.save(output_path, quality=90, optimize=False, progressive=False)
+        else:
+            img.save(output_path)
 
         print(f"✓ Created: {output_path}")
 
@@ -191,12 +338,12 @@ def get_number_of_images(project_folder: str, subfolder: str) -> int:
         print(f"Warning: Folder not found: {folder_path}")
         return 0
 
-    # Count image files in the folder (png, jpg, jpeg - case insensitive)
-    image_files = []
-    for pattern in ["*.png", "*.jpg", "*.jpeg", "*.PNG", "*.JPG", "*.JPEG"]:
-        image_files.extend(folder_path.glob(pattern))
-
-    return len(image_files)
+    # Count image files in a single directory pass (case insensitive)
+    image_exts = {".png", ".jpg", ".jpeg"}
+    return sum(
+        1 for entry in os.scandir(folder_path)
+        if entry.is_file() and os.path.splitext(entry.name)[1].lower() in image_exts
+    )
 
 
 def _update_prompt_file(file_path: Path, num_images: int) -> None:
@@ -207,8 +354,6 @@ def _update_prompt_file(file_path: Path, num_images: int) -> None:
         file_path: Path to the prompt file
         num_images: Number of images to insert
     """
-    import re
-
     if not file_path.exists():
         return
 
@@ -218,8 +363,7 @@ def _update_prompt_file(file_path: Path, num_images: int) -> None:
 
         # Replace the number and make "image" plural if num_images > 1
         image_word = "images" if num_images > 1 else "image"
-        # Pattern to match: (any number image/images)
-        content = re.sub(r'\(\d+\s+images?\)', f'({num_images} {image_word})', content)
+        content = _IMG_COUNT_RE.sub(f'({num_images} {image_word})', content)
 
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
@@ -238,8 +382,6 @@ def _update_socialmedia_file(file_path: Path, num_images: int, platform: str) ->
         num_images: Number of images to insert
         platform: Platform name to insert count after (e.g., "Patreon" or "Fanvue")
     """
-    import re
-
     if not file_path.exists():
         return
 
@@ -251,12 +393,14 @@ def _update_socialmedia_file(file_path: Path, num_images: int, platform: str) ->
         image_word = "images" if num_images > 1 else "image"
         new_text = f" ({num_images} {image_word})"
 
+        old_count_re, insert_re = _platform_patterns(platform)
+
         # Remove any existing image count after the platform name
-        content = re.sub(rf'{platform}\s*\([^)]+\)', platform, content)
+        content = old_count_re.sub(platform, content)
 
         # Insert the new image count after the platform name
         # Handle both cases: "Platform!" and "Platform &"
-        content = re.sub(rf'{platform}(?=\s*[&!])', f'{platform}{new_text}', content)
+        content = insert_re.sub(f'{platform}{new_text}', content)
 
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
@@ -308,6 +452,11 @@ def add_number_to_prompts_nsfw(project_folder: str, num_images: int) -> None:
     _update_socialmedia_file(prompts_folder / "socialmedia.txt", num_images, "Fanvue")
 
 
+def _run_add_text(kwargs: dict) -> None:
+    """Unpack and run a single add_text_to_image job (worker entry point)."""
+    add_text_to_image(**kwargs)
+
+
 def main():
     """Main function to process images based on config file."""
     if len(sys.argv) != 2:
@@ -323,7 +472,10 @@ def main():
         print("Error: 'project_folder' not specified in config")
         sys.exit(1)
 
-    # Process SFW image
+    # Collect image jobs so SFW and NSFW can run in parallel
+    jobs = []
+
+    # Prepare SFW image job
     if "sfw" in config:
         sfw = config["sfw"]
         print(f"Processing SFW image...")
@@ -335,17 +487,19 @@ def main():
         num_images = get_number_of_images(project_folder, "SFW")
         add_number_to_prompts_sfw(project_folder, num_images)
 
-        add_text_to_image(
+        jobs.append(dict(
             input_path=input_path,
             output_path=output_path,
             text=sfw["text"],
-            font_path=config.get("font_path", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+            font_path=config.get("_resolved_font"),
             font_size_percent=sfw.get("font_size_percent", 5),
-            color=sfw.get("color", "#FFFFFF"),
-            num_images=num_images
-        )
+            color=sfw["color"],
+            outline_color=sfw["outline_color"],
+            num_images=num_images,
+            max_output_width=config.get("max_output_width")
+        ))
 
-    # Process NSFW image
+    # Prepare NSFW image job
     if "nsfw" in config:
         nsfw = config["nsfw"]
         print(f"Processing NSFW image...")
@@ -357,17 +511,28 @@ def main():
         num_images = get_number_of_images(project_folder, "NSFW")
         add_number_to_prompts_nsfw(project_folder, num_images)
 
-        add_text_to_image(
+        jobs.append(dict(
             input_path=input_path,
             output_path=output_path,
             text=nsfw["text"],
-            font_path=config.get("font_path", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+            font_path=config.get("_resolved_font"),
             font_size_percent=nsfw.get("font_size_percent", 5),
-            color=nsfw.get("color", "#FFFFFF"),
+            color=nsfw["color"],
+            outline_color=nsfw["outline_color"],
             blur=nsfw.get("blur", True),
             blur_radius=nsfw.get("blur_radius", 15),
-            num_images=num_images
-        )
+            num_images=num_images,
+            max_output_width=config.get("max_output_width")
+        ))
+
+    # Create all output directories once up front instead of per image call
+    for output_dir in {Path(job["output_path"]).parent for job in jobs}:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    # SFW and NSFW are fully independent, so process them on separate cores
+    if jobs:
+        with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+            list(executor.map(_run_add_text, jobs))
 
     print("\n✓ All images processed successfully!")
 
@@ -378,79 +543,50 @@ def main():
     # Get SFW input image for fanvue-api preview
     sfw_input = config["sfw"]["input_image"] if "sfw" in config else None
 
-    # Update telegram-api config.json with output file paths
-    try:
-        telegram_config_path = "/home/pocahontas/git/apis/telegram-api/config.json"
-        with open(telegram_config_path, "r", encoding="utf-8") as f:
-            telegram_config = json.load(f)
-
-        # Update the media section
-        if sfw_output:
-            telegram_config["media"]["sfw_file"] = sfw_output
-        if nsfw_output:
-            telegram_config["media"]["nsfw_file"] = nsfw_output
-
-        with open(telegram_config_path, "w", encoding="utf-8") as f:
-            json.dump(telegram_config, f, ensure_ascii=False, indent=2)
-
-        print(f"\n[INFO] Updated telegram-api config with output file paths")
-    except Exception as e:
-        print(f"[WARNING] Failed to update telegram-api config: {e}")
-
-    # Update x-api config.json with output file paths
-    try:
-        x_config_path = "/home/pocahontas/git/apis/x-api/config.json"
-        with open(x_config_path, "r", encoding="utf-8") as f:
-            x_config = json.load(f)
-
-        # Update the media section
-        if sfw_output:
-            x_config["media"]["sfw_file"] = sfw_output
-        if nsfw_output:
-            x_config["media"]["nsfw_file"] = nsfw_output
-
-        with open(x_config_path, "w", encoding="utf-8") as f:
-            json.dump(x_config, f, ensure_ascii=False, indent=2)
-
-        print(f"\n[INFO] Updated x-api config with output file paths")
-    except Exception as e:
-        print(f"[WARNING] Failed to update x-api config: {e}")
-
-    # Update bluesky-api config.json with output file paths
-    try:
-        bluesky_config_path = "/home/pocahontas/git/apis/bluesky-api/config.json"
-        with open(bluesky_config_path, "r", encoding="utf-8") as f:
-            bluesky_config = json.load(f)
-
-        # Update the media section
-        if sfw_output:
-            bluesky_config["media"]["sfw_file"] = sfw_output
-        if nsfw_output:
-            bluesky_config["media"]["nsfw_file"] = nsfw_output
-
-        with open(bluesky_config_path, "w", encoding="utf-8") as f:
-            json.dump(bluesky_config, f, ensure_ascii=False, indent=2)
-
-        print(f"\n[INFO] Updated bluesky-api config with output file paths")
-    except Exception as e:
-        print(f"[WARNING] Failed to update bluesky-api config: {e}")
-
-    # Update fanvue-api config.json with SFW input image for preview
-    try:
-        fanvue_config_path = "/home/pocahontas/git/apis/fanvue-api/config.json"
-        with open(fanvue_config_path, "r", encoding="utf-8") as f:
-            fanvue_config = json.load(f)
-
-        # Update the post_preview section with SFW input image
-        if sfw_input and "post_preview" in fanvue_config:
-            fanvue_config["post_preview"]["preview_image"] = sfw_input
-
-        with open(fanvue_config_path, "w", encoding="utf-8") as f:
-            json.dump(fanvue_config, f, ensure_ascii=False, indent=2)
-
-        print(f"\n[INFO] Updated fanvue-api config with preview image: {sfw_input}")
-    except Exception as e:
-        print(f"[WARNING] Failed to update fanvue-api config: {e}")
+    def patch_media(data: dict) -> bool:
+        """Point the media section at the new output files; True if changed."""
+        changed = False
+        if sfw_output and data["media"].get("sfw_file") != sfw_output:
+            data["media"]["sfw_file"] = sfw_output
+            changed = True
+        if nsfw_output and data["media"].get("nsfw_file") != nsfw_output:
+            data["media"]["nsfw_file"] = nsfw_output
+            changed = True
+        return changed
+
+    def patch_preview(data: dict) -> bool:
+        """Point post_preview at the SFW input image; True if changed."""
+        if (sfw_input and "post_preview" in data
+                and data["post_preview"].get("preview_image") != sfw_input):
+            data["post_preview"]["preview_image"] = sfw_input
+            return True
+        return False
+
+    # Downstream configs all get the same treatment: load, patch, write
+    updates = [
+        ("telegram-api", "/home/pocahontas/git/apis/telegram-api/config.json",
+         patch_media, "output file paths"),
+        ("x-api", "/home/pocahontas/git/apis/x-api/config.json",
+         patch_media, "output file paths"),
+        ("bluesky-api", "/home/pocahontas/git/apis/bluesky-api/config.json",
+         patch_media, "output file paths"),
+        ("fanvue-api", "/home/pocahontas/git/apis/fanvue-api/config.json",
+         patch_preview, f"preview image: {sfw_input}"),
+    ]
+
+    def apply_update(update):
+        name, config_file, patch_fn, description = update
+        try:
+            if _patch_json(config_file, patch_fn):
+                print(f"\n[INFO] Updated {name} config with {description}")
+            else:
+                print(f"\n[INFO] {name} config already up to date, write skipped")
+        except Exception as e:
+            print(f"[WARNING] Failed to update {name} config: {e}")
+
+    # Pure disk I/O on separate files, so the writes can overlap in threads
+    with ThreadPoolExecutor(max_workers=len(updates)) as executor:
+        list(executor.map(apply_update, updates))
 
 
 if __name__ == "__main__":